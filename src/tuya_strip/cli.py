@@ -1,34 +1,68 @@
-import tinytuya
 import argparse
 import sys
 import json
 import os
 import time
+import random
 import socket
 import shutil
+import functools
 from pathlib import Path
-from dotenv import load_dotenv
 try:
     from importlib.metadata import version
 except ImportError:
     from importlib_metadata import version
 
+# System-wide config location
+_SYSTEM_CONFIG_PATH = Path("/etc/tuya-strip/config")
 
+# CLI defaults
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+
+# Upper bound for the retry backoff in seconds
+MAX_DELAY = 30
+
+# Friendlier messages for common connection failures
+_ERROR_MESSAGES = {
+    socket.timeout: "Device connection timed out - device may be unreachable",
+    ConnectionRefusedError: "Connection refused - device may be offline or wrong IP address",
+}
+
+
+@functools.cache
 def get_version():
-    """Get version from package metadata."""
+    """Get version from package metadata (cached after first call)."""
     try:
         return version("tuya-strip")
     except (ImportError, ModuleNotFoundError):
         return "unknown"
 
 
+@functools.cache
+def _user_config_path():
+    """Resolve the user-specific config path (cached after first call)."""
+    return Path.home() / ".tuya-strip"
+
+
+@functools.cache
+def _config_locations():
+    """Config file locations, in order of precedence (cached after first call)."""
+    return (_user_config_path(), _SYSTEM_CONFIG_PATH)
+
+
+@functools.cache
+def _tuya_strip_path():
+    """Resolve the installed tuya-strip executable (cached after first call)."""
+    return shutil.which("tuya-strip") or "/usr/local/bin/tuya-strip"
+
+
 def _suggest_sudo_command():
     """Helper to suggest the correct sudo command with symlink creation if needed."""
     print("Try running with sudo:")
     print(f"  sudo tuya-strip {' '.join(sys.argv[1:])}")
     print("\nIf 'sudo: tuya-strip: command not found', create a system symlink:")
-    tuya_strip_path = shutil.which("tuya-strip") or "/usr/local/bin/tuya-strip"
-    print(f"  sudo ln -sf {tuya_strip_path} /usr/local/bin/tuya-strip")
+    print(f"  sudo ln -sf {_tuya_strip_path()} /usr/local/bin/tuya-strip")
 
 
 def _handle_permission_error(config_path, is_system_wide):
@@ -39,29 +73,139 @@ def _handle_permission_error(config_path, is_system_wide):
     sys.exit(1)
 
 
+def _parse_config(values):
+    """Build the (device_id, device_ip, local_key, version) tuple.
+
+    Variables already set in the environment take precedence over the
+    config file values, like load_dotenv without override.
+    """
+    environ = os.environ
+
+    def get(key, default=None):
+        value = environ[key] if key in environ else values.get(key)
+        return default if value is None else value
+
+    raw_version = get("TUYA_VERSION", "3.3")
+    try:
+        tuya_version = float(raw_version)
+    except ValueError:
+        print(f"Invalid TUYA_VERSION '{raw_version}' - expected a number like 3.3")
+        sys.exit(1)
+
+    return (
+        get("TUYA_DEVICE_ID"),
+        get("TUYA_DEVICE_IP"),
+        get("TUYA_LOCAL_KEY"),
+        tuya_version,
+    )
+
+
+def _fast_parse_env(config_path):
+    """Parse a plain KEY=value config file without python-dotenv.
+
+    Returns None if the file uses quoting, interpolation, export syntax or
+    inline comments, which are left to dotenv_values.
+    """
+    content = config_path.read_text(encoding="utf-8")
+    if any(c in content for c in ("'", '"', "$")) or "export " in content:
+        return None
+
+    values = {}
+    for line in content.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            key, sep, value = line.partition("=")
+            if "#" in value:
+                return None
+            if sep:
+                values[key.strip()] = value.strip()
+    return values
+
+
+def _read_config_file(config_path):
+    """Parse a config file into a dict, without touching os.environ."""
+    values = _fast_parse_env(config_path)
+    if values is None:
+        from dotenv import dotenv_values
+        values = dotenv_values(config_path)
+    return values
+
+
+def _mtime_ns(path):
+    """Modification time of path, or None if there is no such file."""
+    if path is None:
+        return None
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+# (config_path, mtime_ns, config) of the last load_config() call
+_config_cache = None
+
+
+def _clear_config_cache():
+    """Force the next load_config() call to re-read the configuration."""
+    global _config_cache
+    _config_cache = None
+
+
 def load_config():
-    """Load configuration from various locations."""
-    # Try loading from user-specific config first, then system-wide
-    config_locations = [
-        Path.home() / ".tuya-strip",  # User-specific config
-        Path("/etc/tuya-strip/config"),  # System-wide config
-    ]
-    
-    for config_path in config_locations:
-        if config_path.exists():
-            print(f"Loading config from: {config_path}")
-            load_dotenv(config_path)
-            break
-    else:
-        # If no config file found, just try to load from environment
-        load_dotenv()
-    
-    return {
-        "DEVICE_ID": os.getenv("TUYA_DEVICE_ID"),
-        "DEVICE_IP": os.getenv("TUYA_DEVICE_IP"), 
-        "LOCAL_KEY": os.getenv("TUYA_LOCAL_KEY"),
-        "VERSION": float(os.getenv("TUYA_VERSION", "3.3"))
-    }
+    """Load configuration from various locations.
+
+    Returns a (device_id, device_ip, local_key, version) tuple. The result is
+    cached until the config file it was read from changes on disk.
+    """
+    global _config_cache
+    if _config_cache is not None:
+        config_path, mtime_ns, config = _config_cache
+        if _mtime_ns(config_path) == mtime_ns:
+            return config
+
+    config_path = None
+    values = {}
+
+    # Credentials already provided by the environment (systemd, docker, ...)
+    environ = os.environ
+    if not (environ.get("TUYA_DEVICE_ID") and environ.get("TUYA_DEVICE_IP") and environ.get("TUYA_LOCAL_KEY")):
+        # Try loading from user-specific config first, then system-wide
+        for candidate in _config_locations():
+            if candidate.exists():
+                config_path = candidate
+                print(f"Loading config from: {config_path}")
+                values = _read_config_file(config_path)
+                break
+        else:
+            # If no config file found, fall back to a .env file if there is one
+            from dotenv import find_dotenv
+            dotenv_path = find_dotenv()
+            if dotenv_path:
+                config_path = Path(dotenv_path)
+                values = _read_config_file(config_path)
+
+    config = _parse_config(values)
+    _config_cache = (config_path, _mtime_ns(config_path), config)
+    return config
+
+
+def _read_setup_answers():
+    """Read the four setup fields, in a single read when stdin is piped."""
+    prompts = ("Device ID: ", "Device IP: ", "Local Key: ", "Version (default 3.3): ")
+    if sys.stdin.isatty():
+        return [input(prompt).strip() for prompt in prompts]
+
+    print("Reading answers from stdin, one per line (end input with Ctrl-D):")
+    for prompt in prompts:
+        print(f"  {prompt.rstrip(': ')}")
+
+    lines = sys.stdin.read().splitlines()
+    required = len(prompts) - 1  # Version is optional
+    if len(lines) < required:
+        print(f"\nError: Expected at least {required} lines (Device ID, Device IP, Local Key), got {len(lines)}")
+        sys.exit(1)
+    lines += [""] * (len(prompts) - len(lines))
+    return [line.strip() for line in lines[:len(prompts)]]
 
 
 def setup_config(system_wide=False):
@@ -71,10 +215,8 @@ def setup_config(system_wide=False):
     print("Please enter your Tuya device credentials:")
     print()
     
-    device_id = input("Device ID: ").strip()
-    device_ip = input("Device IP: ").strip()
-    local_key = input("Local Key: ").strip()
-    version = input("Version (default 3.3): ").strip() or "3.3"
+    device_id, device_ip, local_key, version = _read_setup_answers()
+    version = version or "3.3"
     
     config_content = f"""# Tuya device configuration
 TUYA_DEVICE_ID={device_id}
@@ -85,7 +227,7 @@ TUYA_VERSION={version}
     
     # Choose config path based on system_wide flag
     if system_wide:
-        config_path = Path("/etc/tuya-strip/config")
+        config_path = _SYSTEM_CONFIG_PATH
         # Create directory if it doesn't exist (may need sudo)
         try:
             config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -95,37 +237,41 @@ TUYA_VERSION={version}
             _suggest_sudo_command()
             sys.exit(1)
     else:
-        config_path = Path.home() / ".tuya-strip"
+        config_path = _user_config_path()
     
     try:
         config_path.write_text(config_content)
+        _clear_config_cache()
         print(f"\nConfiguration saved to: {config_path}")
         print("You can now use the tuya-strip commands!")
     except PermissionError:
         _handle_permission_error(config_path, system_wide)
 
 
-def run_with_retry(action, retries=3, delay=1):
+def _backoff(attempt, delay, max_delay):
+    """Capped exponential backoff with full jitter for the given attempt."""
+    return random.uniform(0, min(delay * (2 ** (attempt - 1)), max_delay))
+
+
+def _describe_error(e):
+    """Friendly message for known connection errors (and their subclasses)."""
+    for error_type, message in _ERROR_MESSAGES.items():
+        if isinstance(e, error_type):
+            return message
+    return str(e)
+
+
+def run_with_retry(action, retries=3, delay=1, max_delay=MAX_DELAY):
     """Run a device action with retries and error handling."""
     last_error = None
     for attempt in range(1, retries + 1):
         try:
             return action()
-        except socket.timeout:
-            last_error = "Device connection timed out - device may be unreachable"
-            print(f"Attempt {attempt} failed: {last_error}")
-            if attempt < retries:
-                time.sleep(delay)
-        except ConnectionRefusedError:
-            last_error = "Connection refused - device may be offline or wrong IP address"
-            print(f"Attempt {attempt} failed: {last_error}")
-            if attempt < retries:
-                time.sleep(delay)
         except Exception as e:
-            last_error = str(e)
-            print(f"Attempt {attempt} failed: {e}")
+            last_error = _describe_error(e)
+            print(f"Attempt {attempt} failed: {last_error}")
             if attempt < retries:
-                time.sleep(delay)
+                time.sleep(_backoff(attempt, delay, max_delay))
     print(f"All {retries} attempts failed. Last error: {last_error}")
     sys.exit(1)
 
@@ -134,25 +280,27 @@ def do_status(d):
     data = d.status()
     
     # Check for error responses
-    if 'Error' in data:
-        raise Exception(f"Device error: {data['Error']} (Code: {data.get('Err', 'Unknown')})")
+    err = data.get('Error')
+    if err is not None:
+        raise Exception(f"Device error: {err} (Code: {data.get('Err', 'Unknown')})")
     
-    switches = {k: v for k, v in data.get("dps", {}).items() if k in ["1", "2", "3"]}
+    dps = data.get("dps") or {}
+    switches = {k: dps[k] for k in ("1", "2", "3") if k in dps}
     energy = {
-        "voltage_V": data.get("dps", {}).get("20"),
-        "current_mA": data.get("dps", {}).get("18"),
-        "power_W": data.get("dps", {}).get("19"),
+        "voltage_V": dps.get("20"),
+        "current_mA": dps.get("18"),
+        "power_W": dps.get("19"),
     }
-    print("Switches:", switches)
-    print("Energy:", energy)
+    print(f"Switches: {switches}\nEnergy: {energy}")
 
 
 def do_on(d, num):
     result = d.set_status(True, num)
     
     # Check for error responses
-    if 'Error' in result:
-        raise Exception(f"Device error: {result['Error']} (Code: {result.get('Err', 'Unknown')})")
+    err = result.get('Error')
+    if err is not None:
+        raise Exception(f"Device error: {err} (Code: {result.get('Err', 'Unknown')})")
         
     print(f"Plug {num} turned ON")
 
@@ -161,14 +309,15 @@ def do_off(d, num):
     result = d.set_status(False, num)
     
     # Check for error responses
-    if 'Error' in result:
-        raise Exception(f"Device error: {result['Error']} (Code: {result.get('Err', 'Unknown')})")
+    err = result.get('Error')
+    if err is not None:
+        raise Exception(f"Device error: {err} (Code: {result.get('Err', 'Unknown')})")
         
     print(f"Plug {num} turned OFF")
 
 
-def main():
-    # CLI args
+def _build_parser():
+    """Build the full argument parser."""
     parser = argparse.ArgumentParser(description="Control Tuya 3-way power strip over LAN")
     parser.add_argument(
         "--version",
@@ -178,13 +327,13 @@ def main():
     parser.add_argument(
         "--timeout",
         type=int,
-        default=10,
+        default=DEFAULT_TIMEOUT,
         help="Connection timeout in seconds (default: 10)"
     )
     parser.add_argument(
         "--retries",
         type=int,
-        default=3,
+        default=DEFAULT_RETRIES,
         help="Number of retries on failure (default: 3)"
     )
 
@@ -206,7 +355,29 @@ def main():
 
     subparsers.add_parser("status", help="Show device status")
 
-    args = parser.parse_args()
+    return parser
+
+
+def _parse_fast(argv):
+    """Parse the plain 'on N', 'off N' and 'status' forms without argparse.
+
+    Returns None for anything else, so the caller falls back to the full parser.
+    """
+    if argv == ["status"]:
+        return argparse.Namespace(command="status", timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES)
+    if len(argv) == 2 and argv[0] in ("on", "off") and argv[1].isdecimal():
+        return argparse.Namespace(
+            command=argv[0],
+            plug=int(argv[1]),
+            timeout=DEFAULT_TIMEOUT,
+            retries=DEFAULT_RETRIES
+        )
+    return None
+
+
+def main():
+    # CLI args (common commands skip building the full parser)
+    args = _parse_fast(sys.argv[1:]) or _build_parser().parse_args()
 
     # Handle setup command
     if args.command == "setup":
@@ -214,32 +385,29 @@ def main():
         return
 
     # Load credentials
-    config = load_config()
-    DEVICE_ID = config["DEVICE_ID"]
-    DEVICE_IP = config["DEVICE_IP"]
-    LOCAL_KEY = config["LOCAL_KEY"]
-    VERSION = config["VERSION"]
+    device_id, device_ip, local_key, tuya_version = load_config()
 
-    if not all([DEVICE_ID, DEVICE_IP, LOCAL_KEY]):
+    if not (device_id and device_ip and local_key):
         print("Missing credentials. Please run 'tuya-strip setup' to configure your device.")
         sys.exit(1)
 
-    # Init device
+    # Init device (imported lazily to keep setup/--help/--version fast)
+    import tinytuya
     d = tinytuya.OutletDevice(
-        DEVICE_ID,
-        DEVICE_IP,
-        LOCAL_KEY,
+        device_id,
+        device_ip,
+        local_key,
         connection_timeout=args.timeout
     )
-    d.set_version(VERSION)
+    d.set_version(tuya_version)
 
     # Run command
     if args.command == "on":
-        run_with_retry(lambda: do_on(d, args.plug), retries=args.retries)
+        run_with_retry(functools.partial(do_on, d, args.plug), retries=args.retries)
     elif args.command == "off":
-        run_with_retry(lambda: do_off(d, args.plug), retries=args.retries)
+        run_with_retry(functools.partial(do_off, d, args.plug), retries=args.retries)
     elif args.command == "status":
-        run_with_retry(lambda: do_status(d), retries=args.retries)
+        run_with_retry(functools.partial(do_status, d), retries=args.retries)
     else:
-        parser.print_help()
+        _build_parser().print_help()
         sys.exit(1)